@@ -1,9 +1,10 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime, Text, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import json
+from app.signatures import compute_title_signature, signature_to_json, signature_from_json
 
 Base = declarative_base()
 
@@ -29,6 +30,7 @@ class Video(Base):
     like_count = Column(Integer, default=0)
     duration = Column(String(50))
     published_at = Column(DateTime)
+    title_minhash = Column(Text)  # JSON MinHash signature of the title for near-duplicate detection
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class WatchHistory(Base):
@@ -59,6 +61,29 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    _add_missing_video_columns()
+    _backfill_title_signatures()
+
+def _add_missing_video_columns():
+    """Add columns introduced after the videos table was first created"""
+    existing_columns = {column['name'] for column in inspect(engine).get_columns('videos')}
+    if 'title_minhash' not in existing_columns:
+        with engine.begin() as connection:
+            connection.execute(text('ALTER TABLE videos ADD COLUMN title_minhash TEXT'))
+
+def _backfill_title_signatures():
+    """Store title signatures for videos saved before they were computed"""
+    db = SessionLocal()
+    try:
+        videos = db.query(Video).filter(Video.title_minhash.is_(None)).all()
+        for video in videos:
+            video.title_minhash = signature_to_json(compute_title_signature(video.title))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
 
 def get_db():
     """Get database session"""
@@ -160,7 +185,8 @@ def save_video_metadata(video_data):
             view_count=video_data.get('view_count', 0),
             like_count=video_data.get('like_count', 0),
             duration=video_data.get('duration', ''),
-            published_at=datetime.fromisoformat(video_data['published_at'].replace('Z', '+00:00')) if video_data.get('published_at') else None
+            published_at=datetime.fromisoformat(video_data['published_at'].replace('Z', '+00:00')) if video_data.get('published_at') else None,
+            title_minhash=signature_to_json(compute_title_signature(video_data.get('title', '')))
         )
         db.add(video)
         db.commit()
@@ -172,23 +198,39 @@ def save_video_metadata(video_data):
     finally:
         db.close()
 
+def _video_to_dict(video):
+    """Convert a Video row to the metadata dict used across the app"""
+    return {
+        'id': video.video_id,
+        'title': video.title,
+        'description': video.description,
+        'channel_title': video.channel_title,
+        'tags': json.loads(video.tags) if video.tags else [],
+        'view_count': video.view_count,
+        'like_count': video.like_count,
+        'duration': video.duration,
+        'published_at': video.published_at.isoformat() if video.published_at else None,
+        'title_signature': signature_from_json(video.title_minhash)
+    }
+
 def get_video_metadata(video_id):
     """Get video metadata from database"""
     db = SessionLocal()
     try:
         video = db.query(Video).filter(Video.video_id == video_id).first()
         if video:
-            return {
-                'id': video.video_id,
-                'title': video.title,
-                'description': video.description,
-                'channel_title': video.channel_title,
-                'tags': json.loads(video.tags) if video.tags else [],
-                'view_count': video.view_count,
-                'like_count': video.like_count,
-                'duration': video.duration,
-                'published_at': video.published_at.isoformat() if video.published_at else None
-            }
+            return _video_to_dict(video)
         return None
     finally:
         db.close()
+
+def get_videos_metadata(video_ids):
+    """Get metadata for several videos in one query, keyed by video_id"""
+    if not video_ids:
+        return {}
+    db = SessionLocal()
+    try:
+        videos = db.query(Video).filter(Video.video_id.in_(list(video_ids))).all()
+        return {video.video_id: _video_to_dict(video) for video in videos}
+    finally:
+        db.close()
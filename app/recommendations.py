@@ -5,7 +5,8 @@ from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import TruncatedSVD
 from collections import defaultdict
 import json
-from app.database import get_user_interactions, get_video_metadata, save_video_metadata
+from app.database import get_user_interactions, get_video_metadata, get_videos_metadata, save_video_metadata
+from app.signatures import DUPLICATE_SIMILARITY, NUM_PERMUTATIONS
 from app.youtube_api import get_video_details
 
 class HybridRecommender:
@@ -73,15 +74,22 @@ class HybridRecommender:
     
     def content_based_recommendations(self, watched_videos, candidate_videos, top_n=10):
         """Generate content-based recommendations"""
+        recommendations, _, _ = self._content_based_recommendations_with_features(
+            watched_videos, candidate_videos, top_n
+        )
+        return recommendations
+    
+    def _content_based_recommendations_with_features(self, watched_videos, candidate_videos, top_n=10):
+        """Content-based recommendations plus the TF-IDF matrix and id->row map they were scored with"""
         if not watched_videos or not candidate_videos:
-            return []
+            return [], None, {}
         
         # Get features for all videos
         all_video_ids = list(set(watched_videos + candidate_videos))
         tfidf_matrix, valid_ids = self.build_content_features(all_video_ids)
         
         if tfidf_matrix is None or len(valid_ids) < 2:
-            return []
+            return [], None, {}
         
         # Create mapping from video_id to index
         id_to_idx = {vid: idx for idx, vid in enumerate(valid_ids)}
@@ -91,7 +99,7 @@ class HybridRecommender:
         candidate_indices = [id_to_idx[vid] for vid in candidate_videos if vid in id_to_idx]
         
         if not watched_indices or not candidate_indices:
-            return []
+            return [], tfidf_matrix, id_to_idx
         
         # Calculate similarity between watched videos and candidates
         watched_features = tfidf_matrix[watched_indices]
@@ -115,7 +123,7 @@ class HybridRecommender:
                 'type': 'content-based'
             })
         
-        return recommendations
+        return recommendations, tfidf_matrix, id_to_idx
     
     def collaborative_filtering_recommendations(self, user_id, all_users_interactions, candidate_videos, top_n=10):
         """Simple collaborative filtering based on user interactions"""
@@ -175,6 +183,101 @@ class HybridRecommender:
         
         return recommendations
     
+    def rerank_recommendations(self, scored_videos, tfidf_matrix=None, id_to_idx=None, top_n=10,
+                               diversity_lambda=0.7, max_per_channel=2,
+                               duplicate_similarity=DUPLICATE_SIMILARITY):
+        """Diversify a fused ranking with MMR, channel caps and near-duplicate title suppression.
+        
+        `tfidf_matrix` and `id_to_idx` are the features the content scores were computed
+        with. Titles whose estimated Jaccard similarity to an accepted title reaches
+        `duplicate_similarity` are dropped, unless their part/episode numbers differ.
+        Videos held back by the channel cap are only used to fill the list if it would
+        otherwise be short.
+        """
+        if not scored_videos:
+            return []
+        id_to_idx = id_to_idx or {}
+        
+        video_ids = [video_id for video_id, _ in scored_videos]
+        metadata = get_videos_metadata(video_ids)
+        
+        # Scale relevance to [0, 1] so it is comparable with cosine similarity
+        relevance = np.array([score for _, score in scored_videos], dtype=float)
+        max_relevance = relevance.max()
+        if max_relevance > 0:
+            relevance = relevance / max_relevance
+        
+        # Pairwise similarity between candidates from the L2-normalised TF-IDF rows;
+        # videos without content features are treated as dissimilar to everything
+        n = len(video_ids)
+        similarity = np.zeros((n, n))
+        positions = [i for i, vid in enumerate(video_ids) if vid in id_to_idx]
+        if tfidf_matrix is not None and positions:
+            features = tfidf_matrix[[id_to_idx[video_ids[i]] for i in positions]]
+            similarity[np.ix_(positions, positions)] = (features @ features.T).toarray()
+        
+        # Stack MinHash signatures and number keys so each accepted video blocks its
+        # near-duplicates with one vectorised comparison against the whole pool
+        signatures = [metadata.get(vid, {}).get('title_signature') for vid in video_ids]
+        has_signature = np.array([signature is not None for signature in signatures])
+        minhashes = np.zeros((n, NUM_PERMUTATIONS), dtype=np.uint32)
+        number_keys = np.zeros(n, dtype=int)
+        year_keys = np.zeros(n, dtype=int)  # 0 means the title has no year
+        key_ids = {}
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                minhashes[i] = signature['minhash']
+                number_keys[i] = key_ids.setdefault(('n',) + tuple(signature['numbers']), len(key_ids) + 1)
+                if signature['years']:
+                    year_keys[i] = key_ids.setdefault(('y',) + tuple(signature['years']), len(key_ids) + 1)
+        min_matches = duplicate_similarity * NUM_PERMUTATIONS
+        blocked = np.zeros(n, dtype=bool)
+        
+        max_similarity = np.zeros(n)
+        available = np.ones(n, dtype=bool)
+        channel_counts = defaultdict(int)
+        selected = []
+        capped = []  # over the channel cap, in MMR order
+        
+        def accept(idx):
+            selected.append(idx)
+            if not has_signature[idx]:
+                return
+            # Same rule as signatures.is_near_duplicate, applied to every candidate at once
+            similar = np.count_nonzero(minhashes == minhashes[idx], axis=1) >= min_matches
+            same_numbers = number_keys == number_keys[idx]
+            same_years = (year_keys == year_keys[idx]) | (year_keys == 0) | (year_keys[idx] == 0)
+            blocked[similar & has_signature & same_numbers & same_years] = True
+        
+        while len(selected) < top_n and available.any():
+            mmr_scores = diversity_lambda * relevance - (1 - diversity_lambda) * max_similarity
+            mmr_scores[~available] = -np.inf
+            idx = int(np.argmax(mmr_scores))
+            available[idx] = False
+            
+            if blocked[idx]:
+                continue
+            
+            channel = metadata.get(video_ids[idx], {}).get('channel_title')
+            if channel and channel_counts[channel] >= max_per_channel:
+                capped.append(idx)
+                continue
+            
+            accept(idx)
+            if channel:
+                channel_counts[channel] += 1
+            max_similarity = np.maximum(max_similarity, similarity[idx])
+        
+        # Backfill from capped channels rather than return a short list
+        for idx in capped:
+            if len(selected) >= top_n:
+                break
+            if blocked[idx]:
+                continue
+            accept(idx)
+        
+        return [scored_videos[idx] for idx in selected]
+    
     def hybrid_recommendations(self, user_id, candidate_videos, content_weight=0.6, collab_weight=0.4, top_n=10):
         """Combine content-based and collaborative filtering"""
         # Get user's watch history
@@ -186,8 +289,13 @@ class HybridRecommender:
             # If no watch history, fall back to popular videos or random selection
             return self.popular_videos_recommendations(candidate_videos[:top_n])
         
+        # Score every candidate so the reranker has the full pool to diversify from
+        pool_size = len(candidate_videos)
+        
         # Get content-based recommendations
-        content_recs = self.content_based_recommendations(watched_videos, candidate_videos, top_n * 2)
+        content_recs, tfidf_matrix, id_to_idx = self._content_based_recommendations_with_features(
+            watched_videos, candidate_videos, pool_size
+        )
         
         # Get collaborative filtering recommendations
         # For simplicity, we'll use a dummy dataset - in practice, this would come from database
@@ -197,7 +305,7 @@ class HybridRecommender:
             dummy_interactions.append({'user_id': 'other_user_2', 'video_id': vid, 'interaction_type': 'view'})
         
         collab_recs = self.collaborative_filtering_recommendations(
-            user_id, dummy_interactions, candidate_videos, top_n * 2
+            user_id, dummy_interactions, candidate_videos, pool_size
         )
         
         # Combine recommendations using weighted average
@@ -211,9 +319,10 @@ class HybridRecommender:
         for rec in collab_recs:
             final_scores[rec['video_id']] += rec['score'] * collab_weight
         
-        # Sort by final score
+        # Sort by final score, then diversify the fused list
+        ranked = sorted(final_scores.items(), key=lambda x: x[1], reverse=True)
         recommendations = []
-        for video_id, score in sorted(final_scores.items(), key=lambda x: x[1], reverse=True)[:top_n]:
+        for video_id, score in self.rerank_recommendations(ranked, tfidf_matrix, id_to_idx, top_n=top_n):
             recommendations.append({
                 'video_id': video_id,
                 'score': float(score),
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import re
+import numpy as np
+
+NUM_PERMUTATIONS = 128
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Estimated Jaccard similarity at or above which two titles count as near-duplicates.
+# Shingles are words plus in-word character trigrams, so typos, reordered words and
+# an extra suffix word stay around 0.85+, while titles that differ by a whole word
+# ("Python"/"Java tutorial for beginners") land near 0.65.
+DUPLICATE_SIMILARITY = 0.8
+
+# Boilerplate that re-uploads tack on, only stripped inside (...) or [...]
+BRACKET_NOISE_WORDS = {
+    'official', 'video', 'music', 'audio', 'lyrics', 'lyric', 'letra', 'hd', 'hq',
+    '4k', '1080p', 'mv', 'm', 'v', 'remaster', 'remastered', 'full', 'version',
+    'visualizer', 'explicit', 'clean'
+}
+
+# Boilerplate that is stripped anywhere in the title
+NOISE_PHRASES = [
+    'official music video', 'official lyric video', 'official video', 'official audio',
+    'lyric video', 'music video', 'm/v'
+]
+FEATURE_MARKERS = {'ft', 'feat', 'featuring'}
+
+# Numbers that identify a part/episode/sequel rather than decorate a re-upload
+ROMAN_NUMERALS = {'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix'}
+YEAR_PATTERN = re.compile(r'^(19|20)\d\d$')
+
+_BRACKETED = re.compile(r'[(\[]([^)\]]*)[)\]]')
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+def _strip_bracket_noise(match):
+    words = re.findall(r'\w+', match.group(1))
+    return ' ' + ' '.join(word for word in words if word not in BRACKET_NOISE_WORDS) + ' '
+
+def title_words(title):
+    """Lowercase a title and split it into words, dropping boilerplate"""
+    text = str(title or '').lower()
+    for phrase in NOISE_PHRASES:
+        text = text.replace(phrase, ' ')
+    text = _BRACKETED.sub(_strip_bracket_noise, text)
+    return [word for word in re.findall(r'\w+', text) if word not in FEATURE_MARKERS]
+
+def _is_number(word):
+    return word.isdigit() or word in ROMAN_NUMERALS
+
+def title_shingles(words):
+    """Word and in-word character trigram shingles, ignoring word order and numbers"""
+    shingles = set()
+    for word in words:
+        if _is_number(word):
+            continue
+        shingles.add('w:' + word)
+        padded = '_' + word + '_'
+        for i in range(max(len(padded) - 2, 1)):
+            shingles.add('c:' + padded[i:i + 3])
+    return shingles
+
+def compute_title_signature(title):
+    """Compute a MinHash signature plus the title's identifying numbers"""
+    words = title_words(title)
+    shingles = title_shingles(words)
+    if not shingles:
+        return None
+
+    hashes = np.array([
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+        for shingle in shingles
+    ], dtype=np.uint64) % MERSENNE_PRIME
+    minhash = ((hashes[:, None] * _PERM_A + _PERM_B) % MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+
+    numbers = [word for word in words if _is_number(word)]
+    return {
+        'minhash': minhash,
+        'numbers': sorted(set(n for n in numbers if not YEAR_PATTERN.match(n))),
+        'years': sorted(set(n for n in numbers if YEAR_PATTERN.match(n)))
+    }
+
+def signature_to_json(signature):
+    """Encode a signature for storage in the database"""
+    if signature is None:
+        return None
+    return json.dumps({
+        'minhash': signature['minhash'].astype('>u4').tobytes().hex(),
+        'numbers': signature['numbers'],
+        'years': signature['years']
+    })
+
+def signature_from_json(value):
+    """Decode a stored signature"""
+    if not value:
+        return None
+    data = json.loads(value)
+    return {
+        'minhash': np.frombuffer(bytes.fromhex(data['minhash']), dtype='>u4').astype(np.uint32),
+        'numbers': data['numbers'],
+        'years': data['years']
+    }
+
+def numbers_conflict(a, b):
+    """True if two titles carry different part/episode numbers or different years"""
+    if a['numbers'] != b['numbers']:
+        return True
+    return bool(a['years'] and b['years'] and a['years'] != b['years'])
+
+def estimated_similarity(a, b):
+    """MinHash estimate of the Jaccard similarity between two titles' shingle sets"""
+    return float(np.mean(a['minhash'] == b['minhash']))
+
+def is_near_duplicate(a, b, threshold=DUPLICATE_SIMILARITY):
+    """Whether two title signatures describe the same video"""
+    if numbers_conflict(a, b):
+        return False
+    return estimated_similarity(a, b) >= threshold
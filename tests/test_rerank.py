@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from app import recommendations
+from app.recommendations import HybridRecommender
+from app.signatures import compute_title_signature
+
+
+def make_metadata(videos):
+    return {
+        video_id: {
+            'id': video_id,
+            'title': title,
+            'channel_title': channel,
+            'title_signature': compute_title_signature(title),
+        }
+        for video_id, title, channel in videos
+    }
+
+
+@pytest.fixture
+def stub_metadata(monkeypatch):
+    def install(videos):
+        metadata = make_metadata(videos)
+        monkeypatch.setattr(
+            recommendations, 'get_videos_metadata',
+            lambda video_ids: {vid: metadata[vid] for vid in video_ids if vid in metadata}
+        )
+    return install
+
+
+def test_channel_cap_prefers_other_channels(stub_metadata):
+    stub_metadata([
+        ('a1', 'Alpha one', 'A'),
+        ('a2', 'Alpha two', 'A'),
+        ('a3', 'Alpha three', 'A'),
+        ('b1', 'Bravo one', 'B'),
+    ])
+    scored = [('a1', 1.0), ('a2', 0.9), ('a3', 0.8), ('b1', 0.1)]
+
+    result = HybridRecommender().rerank_recommendations(scored, top_n=3, max_per_channel=2)
+
+    assert [vid for vid, _ in result] == ['a1', 'a2', 'b1']
+
+
+def test_capped_videos_backfill_short_list(stub_metadata):
+    channels = ['A', 'B', 'C', 'D', 'E']
+    videos = [(f'v{i}', f'{channels[i % 5]} upload number {i} about topic {i * 7}', channels[i % 5])
+              for i in range(100)]
+    stub_metadata(videos)
+    scored = [(vid, 1.0 - i / 100) for i, (vid, _, _) in enumerate(videos)]
+
+    result = HybridRecommender().rerank_recommendations(scored, top_n=20, max_per_channel=2)
+
+    assert len(result) == 20
+    # The first ten respect the cap; the rest are backfilled from capped channels
+    channel_of = {vid: channel for vid, _, channel in videos}
+    first_channels = [channel_of[vid] for vid, _ in result[:10]]
+    assert all(first_channels.count(channel) == 2 for channel in channels)
+
+
+def test_near_duplicate_titles_are_dropped(stub_metadata):
+    stub_metadata([
+        ('orig', 'Luis Fonsi - Despacito ft. Daddy Yankee', 'LuisFonsiVEVO'),
+        ('reup', 'Luis Fonsi - Despacito (Official Music Video) ft. Daddy Yankee', 'Reuploads'),
+        ('p1', 'Minecraft Part 1', 'Gamer'),
+        ('p2', 'Minecraft Part 2', 'Gamer'),
+    ])
+    scored = [('orig', 1.0), ('reup', 0.95), ('p1', 0.5), ('p2', 0.4)]
+
+    result = HybridRecommender().rerank_recommendations(scored, top_n=4)
+
+    assert [vid for vid, _ in result] == ['orig', 'p1', 'p2']
+
+
+def test_mmr_demotes_content_similar_candidates(stub_metadata):
+    stub_metadata([
+        ('x', 'Cooking pasta at home', 'C1'),
+        ('x_like', 'Italian kitchen basics', 'C2'),
+        ('y', 'Mountain biking trails', 'C3'),
+    ])
+    # x and x_like share a TF-IDF direction; y is orthogonal to both
+    matrix = csr_matrix(np.array([
+        [1.0, 0.0],
+        [1.0, 0.0],
+        [0.0, 1.0],
+    ]))
+    id_to_idx = {'x': 0, 'x_like': 1, 'y': 2}
+    scored = [('x', 1.0), ('x_like', 0.9), ('y', 0.8)]
+
+    recommender = HybridRecommender()
+    plain = recommender.rerank_recommendations(scored, top_n=2, diversity_lambda=0.7)
+    diverse = recommender.rerank_recommendations(scored, matrix, id_to_idx, top_n=2, diversity_lambda=0.7)
+
+    assert [vid for vid, _ in plain] == ['x', 'x_like']
+    assert [vid for vid, _ in diverse] == ['x', 'y']
+
+
+def test_empty_input():
+    assert HybridRecommender().rerank_recommendations([], top_n=5) == []
+
+
+def test_hybrid_recommendations_reranks_fused_pool(monkeypatch):
+    videos = {
+        'w': ('Homemade pasta carbonara recipe', 'Home Cook', 'pasta carbonara cooking italian'),
+        'c1': ('Pasta carbonara recipe', 'Chef', 'pasta carbonara cooking italian'),
+        'c2': ('Easy pasta carbonara at home', 'Chef', 'pasta carbonara cooking italian'),
+        'c3': ('Creamy pasta carbonara recipe', 'Chef', 'pasta carbonara cooking italian'),
+        'dup': ('Pasta Carbonara Recipe (Official Video)', 'Reuploads', 'pasta carbonara cooking italian'),
+        'o1': ('Italian pasta sauce basics', 'Nonna', 'pasta sauce italian'),
+        'o2': ('Mountain bike trail ride', 'Trails', 'bike mountain'),
+        'o3': ('Cooking rice perfectly', 'Rice Lab', 'rice cooking'),
+    }
+    metadata = {
+        vid: {
+            'id': vid,
+            'title': title,
+            'description': description,
+            'channel_title': channel,
+            'tags': [],
+            'title_signature': compute_title_signature(title),
+        }
+        for vid, (title, channel, description) in videos.items()
+    }
+    monkeypatch.setattr(recommendations, 'get_user_interactions',
+                        lambda user_id: [{'video_id': 'w', 'interaction_type': 'view'}])
+    monkeypatch.setattr(recommendations, 'get_video_metadata', lambda vid: metadata.get(vid))
+    monkeypatch.setattr(recommendations, 'get_videos_metadata',
+                        lambda video_ids: {vid: metadata[vid] for vid in video_ids if vid in metadata})
+
+    recommender = HybridRecommender()
+    calls = []
+    rerank = recommender.rerank_recommendations
+
+    def spy(scored_videos, tfidf_matrix=None, id_to_idx=None, **kwargs):
+        calls.append((scored_videos, tfidf_matrix, id_to_idx))
+        return rerank(scored_videos, tfidf_matrix, id_to_idx, **kwargs)
+
+    monkeypatch.setattr(recommender, 'rerank_recommendations', spy)
+
+    candidates = ['c1', 'c2', 'c3', 'dup', 'o1', 'o2', 'o3']
+    result = recommender.hybrid_recommendations('user', candidates, top_n=4)
+
+    # The whole candidate pool is fused and handed over with the content features
+    scored_videos, tfidf_matrix, id_to_idx = calls[0]
+    assert {vid for vid, _ in scored_videos} == set(candidates)
+    assert tfidf_matrix is not None
+    assert set(candidates) <= set(id_to_idx)
+
+    # Fused order is c1, c3, c2, dup, ...: MMR prefers c2 over the c1-like c3, the
+    # re-upload of c1 is dropped and the Chef channel is capped at two
+    assert [vid for vid, _ in scored_videos[:4]] == ['c1', 'c3', 'c2', 'dup']
+    assert [rec['video_id'] for rec in result] == ['c1', 'c2', 'o1', 'o3']
+    assert all(rec['type'] == 'hybrid' for rec in result)
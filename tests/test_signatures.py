@@ -0,0 +1,78 @@
+import numpy as np
+
+from app.signatures import (
+    NUM_PERMUTATIONS,
+    compute_title_signature,
+    estimated_similarity,
+    is_near_duplicate,
+    signature_from_json,
+    signature_to_json,
+    title_words,
+)
+
+DESPACITO = 'Luis Fonsi - Despacito ft. Daddy Yankee'
+
+
+def near_duplicate(a, b):
+    return is_near_duplicate(compute_title_signature(a), compute_title_signature(b))
+
+
+def test_title_words_strip_noise_only_in_brackets_and_phrases():
+    assert title_words('PSY - GANGNAM STYLE (Official M/V) [HD]') == ['psy', 'gangnam', 'style']
+    assert title_words('Despacito (Official Music Video) ft. Daddy Yankee') == ['despacito', 'daddy', 'yankee']
+    assert title_words('Video Games Review') == ['video', 'games', 'review']
+    assert title_words('Rocky V') == ['rocky', 'v']
+
+
+def test_signature_is_deterministic():
+    signature = compute_title_signature('Sia - Chandelier')
+    again = compute_title_signature('Sia - Chandelier')
+    assert signature['minhash'].shape == (NUM_PERMUTATIONS,)
+    assert np.array_equal(signature['minhash'], again['minhash'])
+
+
+def test_noise_only_title_has_no_signature():
+    assert compute_title_signature('(Official Music Video)') is None
+    assert compute_title_signature('') is None
+
+
+def test_json_round_trip():
+    signature = compute_title_signature('Top 10 goals 2023 Part II')
+    decoded = signature_from_json(signature_to_json(signature))
+    assert np.array_equal(decoded['minhash'], signature['minhash'])
+    assert decoded['numbers'] == ['10', 'ii']
+    assert decoded['years'] == ['2023']
+    assert signature_to_json(None) is None
+    assert signature_from_json(None) is None
+
+
+def test_reuploads_are_duplicates():
+    for reupload in [
+        'Luis Fonsi - Despacito ft. Daddy Yankee (Official Video)',
+        'Luis Fonsi - Despacito (Official Music Video) ft. Daddy Yankee',
+        'luis fonsi despacito ft daddy yankee',
+        'Luis Fonsi - Despacito ft. Daddy Yanke',
+        'Luis Fonsi - Despacito ft. Daddy Yankee 2017',
+        'Luis Fonsi - Despacito ft. Daddy Yankee [Lyrics/Letra]',
+        'Despacito - Luis Fonsi ft. Daddy Yankee',
+    ]:
+        assert near_duplicate(DESPACITO, reupload), reupload
+    assert near_duplicate(
+        'Rick Astley - Never Gonna Give You Up (Official Music Video)',
+        'Rick Astley - Never Gonna Give You Up (Official Video) (4K Remaster)'
+    )
+
+
+def test_series_episodes_are_not_duplicates():
+    assert not near_duplicate('Minecraft Part 1', 'Minecraft Part 2')
+    assert not near_duplicate('Top 10 goals 2023', 'Top 10 goals 2024')
+    assert not near_duplicate('Rocky V', 'Rocky')
+
+
+def test_different_titles_are_not_duplicates():
+    assert not near_duplicate('Python tutorial for beginners', 'Java tutorial for beginners')
+    assert not near_duplicate('Video Games Review', 'Games Review')
+    assert not near_duplicate('Sia - Chandelier', 'Sia - Chandelier (Live)')
+    assert estimated_similarity(
+        compute_title_signature('Sia - Chandelier'), compute_title_signature('Sia - Elastic Heart')
+    ) < 0.3